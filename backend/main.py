@@ -1,11 +1,28 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse, Response
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import BaseTarget
+import asyncio
+import hashlib
 import os
-import shutil
-from pdf_processor import PDFProcessor
+import uuid
+from pdf_processor import PDFProcessor, shutdown_render_pool
 
-app = FastAPI(title="PDF Reader API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Stop the page rendering worker processes
+    shutdown_render_pool()
+
+
+app = FastAPI(
+    title="PDF Reader API", default_response_class=ORJSONResponse, lifespan=lifespan
+)
 
 # CORS middleware
 app.add_middleware(
@@ -18,41 +35,189 @@ app.add_middleware(
 
 pdf_processor = PDFProcessor()
 
+UPLOAD_DIR = "/app/uploads"
+
+# Incoming body chunks are batched up to this size before each write
+UPLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Maximum number of buffers a single writev() call accepts
+IOV_MAX = os.sysconf("SC_IOV_MAX")
+
+# Results and rendered page images of the most recently processed documents,
+# keyed by a hash of the uploaded bytes so re-uploads skip processing. The cache
+# is bounded by its approximate size in memory, as documents vary widely
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+processed_documents = OrderedDict()
+cached_bytes = 0
+
+# Rough in-memory size of one Word entry: the object, its string and offsets
+WORD_SIZE_ESTIMATE = 128
+
+
+def _document_size(result: dict, images: list) -> int:
+    """Estimate the bytes held by a cached document"""
+    size = sum(map(len, images))
+    for page in result["pages"]:
+        size += len(page["original_text"]) + len(page["processed_text"])
+        size += len(page["words"]) * WORD_SIZE_ESTIMATE
+    return size
+
+
+def _store_document(document_id: str, result: dict) -> None:
+    """Cache a processing result, moving its page images into the image store"""
+    global cached_bytes
+    pages = result["pages"]
+    images = [page.pop("image") for page in pages]
+    for page in pages:
+        page["image_url"] = f"/page-image/{document_id}/{page['page_number']}.jpg"
+
+    # Concurrent uploads of the same file may both have processed it
+    previous = processed_documents.pop(document_id, None)
+    if previous is not None:
+        cached_bytes -= previous[2]
+
+    size = _document_size(result, images)
+    processed_documents[document_id] = (result, images, size)
+    cached_bytes += size
+    # Evict the least recently used documents, but always keep the new one so
+    # its page images can still be fetched
+    while cached_bytes > MAX_CACHE_BYTES and len(processed_documents) > 1:
+        cached_bytes -= processed_documents.popitem(last=False)[1][2]
+
+
+class _ChunkTarget(BaseTarget):
+    """Collect the bytes of a multipart file part as the parser emits them"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.complete = False
+
+    def on_data_received(self, chunk: bytes):
+        self.chunks.append(chunk)
+
+    def on_finish(self):
+        # Only called once the boundary after the part has been seen
+        self.complete = True
+
+
+def _write_chunks(fd: int, chunks: list) -> None:
+    """Write all chunks to a file descriptor with gathered writev() calls"""
+    pending = [memoryview(chunk) for chunk in chunks]
+    while pending:
+        written = os.writev(fd, pending[:IOV_MAX])
+        # Drop fully written chunks and trim a partially written one
+        while pending and written >= len(pending[0]):
+            written -= len(pending[0])
+            pending.pop(0)
+        if written:
+            pending[0] = pending[0][written:]
+
 
 @app.post("/upload-pdf/")
-async def upload_pdf(file: UploadFile = File(...)):
-    """Upload and process PDF file"""
-    if not file.filename.endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="File must be a PDF")
+async def upload_pdf(request: Request):
+    """Upload and process PDF file streamed from a multipart form body"""
+    # The multipart body is parsed incrementally by the C parser of
+    # streaming-form-data instead of being spooled by Starlette first
+    try:
+        parser = StreamingFormDataParser(headers=request.headers)
+    except ParseFailedException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    target = _ChunkTarget()
+    parser.register("file", target)
 
-    # Save uploaded file
-    upload_dir = "/app/uploads"
-    os.makedirs(upload_dir, exist_ok=True)
-    file_path = os.path.join(upload_dir, file.filename)
+    # Save uploaded file under a unique name; the client filename is only
+    # known once the part headers have been parsed
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.pdf")
 
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        # Process PDF with image extraction and header/footer detection
-        result = pdf_processor.extract_text_and_images_from_pdf(file_path)
-
-        if result["success"]:
-            return JSONResponse(
-                content={
-                    "message": "PDF uploaded and processed successfully",
-                    "data": result,
-                }
-            )
+        # Disk I/O runs on worker threads so other requests keep being served
+        fd = await asyncio.to_thread(
+            os.open, file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
+        )
+        try:
+            # Keep received chunks as-is and hand them to the kernel in one
+            # writev() rather than concatenating them into a Python buffer
+            chunks = []
+            buffered = 0
+            content_hash = hashlib.blake2b(digest_size=16)
+            async for body_chunk in request.stream():
+                parser.data_received(body_chunk)
+                # Reject non-PDF uploads as soon as the part headers are parsed
+                filename = target.multipart_filename
+                if filename is not None and not filename.endswith(".pdf"):
+                    raise HTTPException(status_code=400, detail="File must be a PDF")
+                for chunk in target.chunks:
+                    content_hash.update(chunk)
+                    chunks.append(chunk)
+                    buffered += len(chunk)
+                target.chunks.clear()
+                if buffered >= UPLOAD_BUFFER_SIZE or len(chunks) >= IOV_MAX:
+                    await asyncio.to_thread(_write_chunks, fd, chunks)
+                    chunks = []
+                    buffered = 0
+            if chunks:
+                await asyncio.to_thread(_write_chunks, fd, chunks)
+        finally:
+            await asyncio.to_thread(os.close, fd)
+
+        if not target.multipart_filename:
+            raise HTTPException(status_code=400, detail="File must be a PDF")
+        # A body cut off inside the file part would hand a partial PDF to MuPDF
+        if not target.complete:
+            raise HTTPException(status_code=400, detail="Incomplete upload")
+
+        # Identical uploads are answered from the cache
+        document_id = content_hash.hexdigest()
+        cached = processed_documents.get(document_id)
+        if cached is not None:
+            processed_documents.move_to_end(document_id)
+            result = cached[0]
         else:
-            raise HTTPException(status_code=500, detail=result["error"])
-
+            # Process PDF with image extraction and header/footer detection.
+            # This is CPU-bound, so run it on a worker thread to keep the loop
+            # responsive
+            result = await asyncio.to_thread(
+                pdf_processor.extract_text_and_images_from_pdf, file_path
+            )
+            if not result["success"]:
+                raise HTTPException(status_code=500, detail=result["error"])
+
+            # Images are served raw from /page-image/ instead of inlined as base64
+            _store_document(document_id, result)
+
+        return ORJSONResponse(
+            content={
+                "message": "PDF uploaded and processed successfully",
+                "data": result,
+            }
+        )
+
+    except HTTPException:
+        raise
+    except ParseFailedException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     finally:
         # Clean up uploaded file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        try:
+            await asyncio.to_thread(os.remove, file_path)
+        except FileNotFoundError:
+            pass
+
+
+@app.get("/page-image/{document_id}/{page_number}.jpg")
+async def get_page_image(document_id: str, page_number: int):
+    """Return the rendered image of a processed page"""
+    cached = processed_documents.get(document_id)
+    images = cached[1] if cached is not None else []
+    if not 1 <= page_number <= len(images):
+        raise HTTPException(status_code=404, detail="Page image not found")
+
+    processed_documents.move_to_end(document_id)
+    return Response(content=images[page_number - 1], media_type="image/jpeg")
 
 
 @app.get("/synthesize-speech/")
@@ -61,7 +226,7 @@ async def synthesize_speech(text: str):
     if not text:
         raise HTTPException(status_code=400, detail="Text is required")
 
-    return JSONResponse(content={"text": text, "message": "Text ready for synthesis"})
+    return ORJSONResponse(content={"text": text, "message": "Text ready for synthesis"})
 
 
 @app.get("/health")
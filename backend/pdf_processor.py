@@ -1,12 +1,80 @@
 import PyPDF2
 import fitz  # PyMuPDF
-from pdf2image import convert_from_path
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterable, Tuple
 import re
-import base64
-import io
 from collections import Counter
+from itertools import chain, repeat
+import multiprocessing
 import os
+import threading
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from operator import attrgetter
+
+# Default resolution and JPEG quality used when rasterizing pages; the
+# frontend scales page images to the available width
+RENDER_DPI = 100
+JPEG_QUALITY = 82
+
+# Documents with at least this many pages are rendered in a process pool
+PARALLEL_PAGE_THRESHOLD = 4
+MAX_RENDER_WORKERS = 6
+
+# Worker pool shared by all uploads, created on first use. forkserver workers
+# are never forked from this process, whose other threads may be inside MuPDF
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+# Serializes MuPDF use by the threads of this process
+_mupdf_lock = threading.Lock()
+
+# Maximal runs of word characters always sit on word boundaries, so this
+# matches the same spans as r"\b\w+\b" without the boundary assertions
+WORD_PATTERN = re.compile(r"\w+")
+
+# Digit runs are ignored when comparing header/footer candidates
+DIGIT_RUN_PATTERN = re.compile(r"\d+")
+
+# Common header/footer indicators
+HEADER_FOOTER_INDICATORS = [
+    # Page numbers
+    r"^\d+$",  # Just a number
+    r"page\s+\d+",  # "Page 1"
+    r"\d+\s+of\s+\d+",  # "1 of 10"
+    # Common header/footer content
+    r"chapter\s+\d+",
+    r"©.*\d{4}",  # Copyright
+    r"confidential",
+    r"proprietary",
+    r"draft",
+    r"internal use",
+    # Website/email patterns
+    r"www\.",
+    r"@.*\.com",
+    r"\.pdf$",
+    # Date patterns
+    r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}",
+]
+
+# All indicators combined so each line is checked with a single search.
+# Matching case-insensitively saves lowercasing every candidate line
+HEADER_FOOTER_PATTERN = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in HEADER_FOOTER_INDICATORS),
+    re.IGNORECASE,
+)
+
+
+# orjson serializes dataclasses natively, so words still reach the client as
+# {"word": ..., "start_pos": ..., "end_pos": ...} objects
+@dataclass(slots=True)
+class Word:
+    """A word and its character span in the page text"""
+
+    word: str
+    start_pos: int
+    end_pos: int
 
 
 class PDFProcessor:
@@ -14,62 +82,77 @@ class PDFProcessor:
         self.current_pdf = None
         self.pages_text = []
 
-    def extract_text_and_images_from_pdf(self, pdf_file_path: str) -> Dict:
+    def extract_text_and_images_from_pdf(
+        self, pdf_file_path: str, dpi: int = RENDER_DPI
+    ) -> Dict:
         """Extract text, images, and detect headers/footers from PDF"""
         try:
-            # Convert PDF pages to images
-            images = convert_from_path(pdf_file_path, dpi=150)
-
-            # Open PDF with PyMuPDF for better text extraction
-            pdf_document = fitz.open(pdf_file_path)
-
             pages_data = []
+            pages_text = []
             all_page_lines = []
-
-            # First pass: collect all text to analyze headers/footers
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-                text = page.get_text()
-                lines = [line.strip() for line in text.split("\n") if line.strip()]
-                all_page_lines.append(lines)
-
-            # Detect common headers and footers
-            header_patterns, footer_patterns = self._detect_headers_footers(
-                all_page_lines
-            )
-
-            # Second pass: process each page
-            for page_num in range(len(pdf_document)):
-                page = pdf_document[page_num]
-
-                # Get text with position information
-                text_dict = page.get_text("dict")
-                full_text = page.get_text()
-
-                # Convert page image to base64
-                page_image = images[page_num]
-                img_buffer = io.BytesIO()
-                page_image.save(img_buffer, format="PNG")
-                img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-
-                # Process text and remove headers/footers
-                processed_text, words = self._process_page_text(
-                    full_text, text_dict, header_patterns, footer_patterns
+            all_page_templates = []
+
+            # MuPDF must not be used from several threads at once, and uploads
+            # are extracted concurrently on worker threads
+            with _mupdf_lock, fitz.open(pdf_file_path) as pdf_document:
+                # First pass: collect all text to analyze headers/footers. The
+                # text is kept so the second pass doesn't extract it again
+                for page_num in range(len(pdf_document)):
+                    page = pdf_document[page_num]
+                    text = page.get_text()
+                    pages_text.append(text)
+                    lines = [line.strip() for line in text.split("\n") if line.strip()]
+                    all_page_lines.append(lines)
+                    all_page_templates.append(self._window_templates(lines))
+
+                # Detect common headers and footers, then locate them on each
+                # page. The patterns report every line variant that is removed
+                header_templates, footer_templates = self._detect_headers_footers(
+                    all_page_lines, all_page_templates
                 )
-
-                pages_data.append(
-                    {
-                        "page_number": page_num + 1,
-                        "original_text": full_text,
-                        "processed_text": processed_text,
-                        "words": words,
-                        "image": img_base64,
-                        "has_header_footer_removal": len(processed_text)
-                        < len(full_text),
-                    }
+                # Lines without digits are their own template. As before, these
+                # are removed wherever they appear on a page
+                exact_lines = frozenset(
+                    template[0]
+                    for template in header_templates | footer_templates
+                    if len(template) == 1
+                )
+                header_patterns = {}
+                footer_patterns = {}
+                pages_skipped_lines = []
+                for lines, templates in zip(all_page_lines, all_page_templates):
+                    header_lines, footer_lines = self._locate_headers_footers(
+                        templates, len(lines), header_templates, footer_templates
+                    )
+                    header_patterns.update(
+                        dict.fromkeys(lines[i] for i in header_lines)
+                    )
+                    footer_patterns.update(
+                        dict.fromkeys(lines[i] for i in footer_lines)
+                    )
+                    pages_skipped_lines.append(frozenset(header_lines + footer_lines))
+
+                # Second pass: process each page. Small documents are rendered
+                # here, larger ones in the worker pool below
+                zoom = dpi / 72  # PDF user space is 72 dpi
+                page_count = len(pdf_document)
+                if page_count < PARALLEL_PAGE_THRESHOLD:
+                    for page_num in range(page_count):
+                        pages_data.append(
+                            self._build_page_data(
+                                pdf_document[page_num],
+                                page_num,
+                                pages_text[page_num],
+                                pages_skipped_lines[page_num],
+                                exact_lines,
+                                zoom,
+                            )
+                        )
+
+            if page_count >= PARALLEL_PAGE_THRESHOLD:
+                pages_data = _render_pages(
+                    pdf_file_path, pages_text, pages_skipped_lines, exact_lines, zoom
                 )
-
-            pdf_document.close()
 
             return {
                 "success": True,
@@ -82,121 +165,175 @@ class PDFProcessor:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def _build_page_data(
+        self,
+        page: fitz.Page,
+        page_num: int,
+        full_text: str,
+        skipped_lines: frozenset,
+        exact_lines: frozenset,
+        zoom: float,
+    ) -> Dict:
+        """Render the image and remove headers/footers for one page"""
+        # Render page image with MuPDF as raw JPEG bytes
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        image = pix.tobytes("jpeg", jpg_quality=JPEG_QUALITY)
+
+        # Process text and remove headers/footers
+        processed_text, words = self._process_page_text(
+            full_text, skipped_lines, exact_lines
+        )
+
+        return {
+            "page_number": page_num + 1,
+            "original_text": full_text,
+            "processed_text": processed_text,
+            "words": words,
+            "image": image,
+            "has_header_footer_removal": len(processed_text) < len(full_text),
+        }
+
+    def _window_templates(self, lines: List[str]) -> Dict[int, tuple]:
+        """Compute the templates of a page's possible header/footer lines"""
+        # The first and last 3 lines overlap on short pages; each line's
+        # template is computed once and shared by detection and location
+        indexes = chain(
+            range(min(3, len(lines))), range(max(3, len(lines) - 3), len(lines))
+        )
+        return {index: self._line_template(lines[index]) for index in indexes}
+
     def _detect_headers_footers(
-        self, all_page_lines: List[List[str]]
-    ) -> Tuple[set, set]:
-        """Detect common headers and footers across pages"""
+        self, all_page_lines: List[List[str]], all_page_templates: List[Dict]
+    ) -> Tuple[frozenset, frozenset]:
+        """Detect common header and footer line templates across pages"""
         if len(all_page_lines) < 2:
-            return set(), set()
+            return frozenset(), frozenset()
 
         # Analyze first few lines (potential headers) and last few lines (potential footers)
-        first_lines = []
-        last_lines = []
-
-        for lines in all_page_lines:
-            if len(lines) >= 3:
-                # Consider first 3 lines as potential headers
-                first_lines.extend(lines[:3])
-                # Consider last 3 lines as potential footers
-                last_lines.extend(lines[-3:])
-
-        # Find lines that appear frequently (likely headers/footers)
-        first_line_counts = Counter(first_lines)
-        last_line_counts = Counter(last_lines)
+        pages = [
+            (lines, templates)
+            for lines, templates in zip(all_page_lines, all_page_templates)
+            if len(lines) >= 3
+        ]
 
         # Consider a line as header/footer if it appears on at least 30% of pages
         min_frequency = max(2, len(all_page_lines) * 0.3)
 
-        headers = set()
-        footers = set()
-
-        for line, count in first_line_counts.items():
-            if count >= min_frequency and self._is_likely_header_footer(line):
-                headers.add(line)
-
-        for line, count in last_line_counts.items():
-            if count >= min_frequency and self._is_likely_header_footer(line):
-                footers.add(line)
+        # Find lines that appear frequently (likely headers/footers)
+        headers = self._find_repeated_templates(
+            ((lines[i], templates[i]) for lines, templates in pages for i in range(3)),
+            min_frequency,
+        )
+        footers = self._find_repeated_templates(
+            (
+                (lines[i], templates[i])
+                for lines, templates in pages
+                for i in range(len(lines) - 3, len(lines))
+            ),
+            min_frequency,
+        )
 
         return headers, footers
 
-    def _is_likely_header_footer(self, line: str) -> bool:
-        """Determine if a line is likely to be a header or footer"""
-        line_lower = line.lower().strip()
+    def _find_repeated_templates(
+        self, candidates: Iterable[Tuple[str, tuple]], min_frequency: float
+    ) -> frozenset:
+        """Find templates of lines that repeat across pages like headers/footers"""
+        # Lines are grouped by their template, so "Page 1 of 9" and
+        # "Page 2 of 9" count as the same line
+        template_counts = Counter()
+        template_likely = {}
+        for line, template in candidates:
+            template_counts[template] += 1
+            # The whole group has to look like a header/footer, not just one
+            # line. A digit-free template only ever has the one line to check
+            likely = template_likely.get(template)
+            if likely is None or (likely and len(template) > 1):
+                template_likely[template] = self._is_likely_header_footer(line)
+
+        return frozenset(
+            template
+            for template, count in template_counts.items()
+            if count >= min_frequency and template_likely[template]
+        )
+
+    def _line_template(self, line: str) -> tuple:
+        """Split a line around its digit runs, ignoring differences in numbers"""
+        return tuple(DIGIT_RUN_PATTERN.split(line))
 
+    def _is_likely_header_footer(self, line: str) -> bool:
+        """Determine if a stripped line is likely to be a header or footer"""
         # Skip very short lines or very long lines
-        if len(line_lower) < 3 or len(line_lower) > 100:
+        if len(line) < 3 or len(line) > 100:
             return False
 
-        # Common header/footer indicators
-        header_footer_indicators = [
-            # Page numbers
-            r"^\d+$",  # Just a number
-            r"page\s+\d+",  # "Page 1"
-            r"\d+\s+of\s+\d+",  # "1 of 10"
-            # Common header/footer content
-            r"chapter\s+\d+",
-            r"©.*\d{4}",  # Copyright
-            r"confidential",
-            r"proprietary",
-            r"draft",
-            r"internal use",
-            # Website/email patterns
-            r"www\.",
-            r"@.*\.com",
-            r"\.pdf$",
-            # Date patterns
-            r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}",
-        ]
-
-        for pattern in header_footer_indicators:
-            if re.search(pattern, line_lower):
-                return True
+        return HEADER_FOOTER_PATTERN.search(line) is not None
 
-        return False
+    def _locate_headers_footers(
+        self,
+        templates: Dict[int, tuple],
+        line_count: int,
+        header_templates: frozenset,
+        footer_templates: frozenset,
+    ) -> Tuple[List[int], List[int]]:
+        """Find the indexes of a page's header and footer lines"""
+        # Headers are only looked for in the first 3 lines and footers in the
+        # last 3, taking the line nearest the page edge for each template.
+        # Numbered lines elsewhere, like "Page 4 of 9" in body text, are kept
+        header_lines = []
+        seen = set()
+        for index in range(min(3, line_count)):
+            template = templates[index]
+            if template in header_templates and template not in seen:
+                seen.add(template)
+                header_lines.append(index)
+
+        footer_lines = []
+        seen = set()
+        for index in reversed(range(max(0, line_count - 3), line_count)):
+            template = templates[index]
+            if template in footer_templates and template not in seen:
+                seen.add(template)
+                footer_lines.append(index)
+
+        return header_lines, footer_lines
 
     def _process_page_text(
         self,
         full_text: str,
-        text_dict: Dict,
-        header_patterns: set,
-        footer_patterns: set,
-    ) -> Tuple[str, List[Dict]]:
+        skipped_lines: frozenset,
+        exact_lines: frozenset,
+    ) -> Tuple[str, List[Word]]:
         """Process page text to remove headers/footers and extract words"""
-        lines = full_text.split("\n")
-        filtered_lines = []
-
-        for line in lines:
-            line_stripped = line.strip()
-            if (
-                line_stripped
-                and line_stripped not in header_patterns
-                and line_stripped not in footer_patterns
-            ):
-                filtered_lines.append(line)
-
-        processed_text = "\n".join(filtered_lines)
+        processed_text = "\n".join(
+            self._iter_kept_lines(full_text, skipped_lines, exact_lines)
+        )
         words = self._extract_words_with_positions(processed_text)
 
         return processed_text, words
 
-    def _extract_words_with_positions(self, text: str) -> List[Dict]:
+    def _iter_kept_lines(
+        self, full_text: str, skipped_lines: frozenset, exact_lines: frozenset
+    ):
+        """Yield the non-blank lines of a page that aren't headers/footers"""
+        # Filter in one pass over the raw lines without building an intermediate
+        # list. Indexes in skipped_lines count non-blank lines, as in the first pass
+        index = 0
+        for line in full_text.split("\n"):
+            stripped = line.strip()
+            if stripped:
+                if index not in skipped_lines and stripped not in exact_lines:
+                    yield line
+                index += 1
+
+    def _extract_words_with_positions(self, text: str) -> List[Word]:
         """Extract individual words with their positions in the text"""
-        words = []
-        word_pattern = re.compile(r"\b\w+\b")
-
-        for match in word_pattern.finditer(text):
-            words.append(
-                {
-                    "word": match.group(),
-                    "start_pos": match.start(),
-                    "end_pos": match.end(),
-                }
-            )
-
-        return words
+        return [
+            Word(match.group(), match.start(), match.end())
+            for match in WORD_PATTERN.finditer(text)
+        ]
 
-    def get_words_from_position(self, page_number: int, position: int) -> List[Dict]:
+    def get_words_from_position(self, page_number: int, position: int) -> List[Word]:
         """Get words starting from a specific position in the text"""
         if page_number > len(self.pages_text):
             return []
@@ -204,10 +341,88 @@ class PDFProcessor:
         page_data = self.pages_text[page_number - 1]
         words = page_data.get("words", [])
 
-        # Find words starting from the given position
-        result_words = []
-        for word_data in words:
-            if word_data["start_pos"] >= position:
-                result_words.append(word_data)
+        # Words are ordered by start_pos, so binary search for the first match
+        first = bisect_left(words, position, key=attrgetter("start_pos"))
+        return words[first:]
+
+
+def _render_page(
+    pdf_file_path: str,
+    page_num: int,
+    full_text: str,
+    skipped_lines: frozenset,
+    exact_lines: frozenset,
+    zoom: float,
+) -> Dict:
+    """Process a single page in a worker process"""
+    with fitz.open(pdf_file_path) as pdf_document:
+        return PDFProcessor()._build_page_data(
+            pdf_document[page_num],
+            page_num,
+            full_text,
+            skipped_lines,
+            exact_lines,
+            zoom,
+        )
+
+
+def _render_pages(
+    pdf_file_path: str,
+    pages_text: List[str],
+    pages_skipped_lines: List[frozenset],
+    exact_lines: frozenset,
+    zoom: float,
+) -> List[Dict]:
+    """Process all pages in the worker pool"""
+    # A worker killed by a crash or the OOM killer breaks the whole pool. It is
+    # replaced, and the pages retried once, so one bad upload can't disable
+    # rendering for every later one
+    for attempt in range(2):
+        pool = _get_render_pool()
+        try:
+            # Each worker opens its own document; fitz handles can't be shared
+            return list(
+                pool.map(
+                    _render_page,
+                    repeat(pdf_file_path),
+                    range(len(pages_text)),
+                    pages_text,
+                    pages_skipped_lines,
+                    repeat(exact_lines),
+                    repeat(zoom),
+                )
+            )
+        except BrokenProcessPool:
+            _discard_render_pool(pool)
+            if attempt:
+                raise
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Return the shared page rendering pool, starting it if needed"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=min(os.cpu_count() or 1, MAX_RENDER_WORKERS),
+                mp_context=multiprocessing.get_context("forkserver"),
+            )
+        return _render_pool
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next upload starts a fresh one"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
 
-        return result_words
+def shutdown_render_pool() -> None:
+    """Stop the page rendering workers"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown()
+            _render_pool = None
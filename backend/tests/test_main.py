@@ -0,0 +1,117 @@
+import os
+
+import fitz  # PyMuPDF
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "processed_documents", main.OrderedDict())
+    monkeypatch.setattr(main, "cached_bytes", 0)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def pdf_bytes():
+    pdf_document = fitz.open()
+    page = pdf_document.new_page()
+    page.insert_text((72, 72), "Hello world")
+    data = pdf_document.tobytes()
+    pdf_document.close()
+    return data
+
+
+def upload(client, filename, data):
+    return client.post(
+        "/upload-pdf/", files={"file": (filename, data, "application/pdf")}
+    )
+
+
+def test_upload_returns_page_image_urls(client, pdf_bytes):
+    response = upload(client, "document.pdf", pdf_bytes)
+
+    assert response.status_code == 200
+    page = response.json()["data"]["pages"][0]
+    assert page["processed_text"] == "Hello world"
+    assert "image" not in page
+
+    image = client.get(page["image_url"])
+    assert image.status_code == 200
+    assert image.headers["content-type"] == "image/jpeg"
+    assert image.content.startswith(b"\xff\xd8")
+
+
+def test_identical_upload_is_answered_from_the_cache(client, pdf_bytes, monkeypatch):
+    first = upload(client, "document.pdf", pdf_bytes)
+
+    def fail(pdf_file_path):
+        raise AssertionError("document processed twice")
+
+    monkeypatch.setattr(main.pdf_processor, "extract_text_and_images_from_pdf", fail)
+    second = upload(client, "copy.pdf", pdf_bytes)
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+
+
+def test_non_pdf_filename_is_rejected(client):
+    response = upload(client, "notes.txt", b"plain text")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "File must be a PDF"
+
+
+def test_non_multipart_body_is_rejected(client, pdf_bytes):
+    response = client.post(
+        "/upload-pdf/",
+        content=pdf_bytes,
+        headers={"Content-Type": "application/pdf"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_truncated_multipart_body_is_rejected(client, pdf_bytes):
+    body = (
+        b"--boundary\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="document.pdf"\r\n'
+        b"Content-Type: application/pdf\r\n\r\n" + pdf_bytes
+    )
+    response = client.post(
+        "/upload-pdf/",
+        content=body,
+        headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Incomplete upload"
+
+
+def test_unknown_page_image_is_not_found(client, pdf_bytes):
+    page = upload(client, "document.pdf", pdf_bytes).json()["data"]["pages"][0]
+    document_id = page["image_url"].split("/")[2]
+
+    assert client.get("/page-image/unknown/1.jpg").status_code == 404
+    assert client.get(f"/page-image/{document_id}/2.jpg").status_code == 404
+
+
+def test_write_chunks_resumes_after_partial_writes(tmp_path, monkeypatch):
+    writev = os.writev
+
+    def short_writev(fd, buffers):
+        # Write at most 3 bytes per call, splitting chunks across calls
+        return writev(fd, [bytes(buffers[0][:3])])
+
+    monkeypatch.setattr(os, "writev", short_writev)
+    path = tmp_path / "chunks"
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT)
+    try:
+        main._write_chunks(fd, [b"abcde", b"", b"fg", b"hijklmn"])
+    finally:
+        os.close(fd)
+
+    assert path.read_bytes() == b"abcdefghijklmn"
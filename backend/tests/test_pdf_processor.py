@@ -0,0 +1,103 @@
+import os
+import signal
+
+import fitz  # PyMuPDF
+import pytest
+
+import pdf_processor
+from pdf_processor import PDFProcessor, shutdown_render_pool
+
+
+@pytest.fixture(scope="module", autouse=True)
+def render_pool():
+    yield
+    shutdown_render_pool()
+
+
+def make_pdf(tmp_path, pages):
+    """Write a PDF with one text line per entry of each page"""
+    pdf_document = fitz.open()
+    for lines in pages:
+        page = pdf_document.new_page()
+        for line_num, line in enumerate(lines):
+            page.insert_text((72, 72 + 20 * line_num), line)
+    path = tmp_path / "document.pdf"
+    pdf_document.save(path)
+    pdf_document.close()
+    return str(path)
+
+
+def extract(tmp_path, pages):
+    result = PDFProcessor().extract_text_and_images_from_pdf(make_pdf(tmp_path, pages))
+    assert result["success"], result.get("error")
+    return result
+
+
+def test_page_numbers_below_three_characters_are_kept(tmp_path):
+    pages = [
+        ["Report", f"Body text {n}", "More body text", str(n)] for n in range(1, 21)
+    ]
+
+    result = extract(tmp_path, pages)
+
+    assert result["footer_patterns"] == []
+    assert (
+        result["pages"][4]["processed_text"] == "Report\nBody text 5\nMore body text\n5"
+    )
+
+
+def test_only_the_page_number_line_is_removed_from_a_page(tmp_path):
+    pages = [["Intro", "Body text", "More body text", str(n)] for n in range(100, 104)]
+    pages[1] = ["Table", "2023", "value 5", "171", "101"]
+
+    result = extract(tmp_path, pages)
+
+    assert result["pages"][1]["processed_text"] == "Table\n2023\nvalue 5\n171"
+
+
+def test_page_n_of_m_footers_report_every_variant(tmp_path):
+    pages = [
+        ["ACME Confidential Report", f"Section {n}", "Body text", f"Page {n} of 3"]
+        for n in range(1, 4)
+    ]
+
+    result = extract(tmp_path, pages)
+
+    assert result["header_patterns"] == ["ACME Confidential Report"]
+    assert result["footer_patterns"] == ["Page 1 of 3", "Page 2 of 3", "Page 3 of 3"]
+    assert result["pages"][2]["processed_text"] == "Section 3\nBody text"
+
+
+def test_headers_without_digits_are_removed_anywhere_on_a_page(tmp_path):
+    pages = [["Internal Use Only", f"Section {n}", "Body text"] for n in range(1, 4)]
+    pages[1] = ["Internal Use Only", "Section 2", "Internal Use Only", "Body text"]
+
+    result = extract(tmp_path, pages)
+
+    assert result["header_patterns"] == ["Internal Use Only"]
+    assert result["pages"][1]["processed_text"] == "Section 2\nBody text"
+
+
+def test_numbered_lines_without_indicators_are_kept(tmp_path):
+    pages = [[f"Section {n}", "Body text", "More body text"] for n in range(1, 4)]
+
+    result = extract(tmp_path, pages)
+
+    assert result["header_patterns"] == []
+    assert (
+        result["pages"][0]["processed_text"] == "Section 1\nBody text\nMore body text"
+    )
+
+
+def test_extraction_recovers_after_a_render_worker_dies(tmp_path):
+    pages = [[f"Body text {n}", "More body text"] for n in range(6)]
+    extract(tmp_path, pages)
+
+    # Simulate a MuPDF crash or the OOM killer taking out one worker
+    pool = pdf_processor._render_pool
+    os.kill(next(iter(pool._processes)), signal.SIGKILL)
+
+    result = extract(tmp_path, pages)
+
+    assert result["total_pages"] == 6
+    assert pdf_processor._render_pool is not pool
@@ -11,7 +11,7 @@ interface PageData {
   original_text: string;
   processed_text: string;
   words: WordData[];
-  image: string | null;
+  image_url: string | null;
   has_header_footer_removal: boolean;
 }
 
@@ -262,7 +262,7 @@ class PDFReaderApp {
 
     this.currentPDF.pages.forEach((page, pageIndex) => {
       console.log(
-        `Rendering page ${pageIndex}, image available: ${!!page.image}`
+        `Rendering page ${pageIndex}, image available: ${!!page.image_url}`
       );
 
       const pageDiv = document.createElement("div");
@@ -275,19 +275,19 @@ class PDFReaderApp {
       pageHeader.textContent = `Page ${page.page_number}`;
       pageDiv.appendChild(pageHeader);
 
-      if (this.isImageView && page.image) {
+      if (this.isImageView && page.image_url) {
         console.log(`Creating image view for page ${pageIndex}`);
         // Render PDF page as image
         const img = document.createElement("img");
-        img.src = `data:image/png;base64,${page.image}`;
+        img.src = `${this.apiBaseUrl}${page.image_url}`;
         img.alt = `Page ${page.page_number}`;
-        img.style.maxWidth = "100%";
+        img.style.width = "100%";
         img.style.height = "auto";
         pageDiv.appendChild(img);
 
         // Add click handler for image view - but NOT as an overlay that interferes
         this.addImageClickHandler(pageDiv, pageIndex);
-      } else if (this.isImageView && !page.image) {
+      } else if (this.isImageView && !page.image_url) {
         console.log(`No image available for page ${pageIndex}`);
         // Show message that image view is not available
         const messageDiv = document.createElement("div");